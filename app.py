@@ -1,24 +1,51 @@
-from flask import Flask, render_template, request, redirect, send_from_directory, session, url_for, flash, jsonify
-from functools import wraps
+from flask import Flask, render_template, request, redirect, send_from_directory, session, url_for, flash, jsonify, Response
+from functools import wraps, lru_cache
 from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.utils import secure_filename
+from werkzeug.middleware.proxy_fix import ProxyFix
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from jinja2 import FileSystemBytecodeCache
 import os
-from datetime import datetime
 import re
+import json
+from types import SimpleNamespace
+import hashlib
+import secrets
+import threading
+import time
 
 import io
 import zipfile
 import requests
-from flask import send_file
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
+import cloudinary.api_client.execute_request
+import orjson
+from cachetools import TTLCache
 
 app = Flask(__name__)
+# Behind a reverse proxy (Render/Heroku set TRUSTED_PROXY_COUNT=1, see Procfile),
+# trust its X-Forwarded-For so request.remote_addr (used by the login rate limit)
+# is the real client IP. Off by default: without a proxy, clients could spoof it.
+TRUSTED_PROXY_COUNT = int(os.environ.get("TRUSTED_PROXY_COUNT", "0"))
+if TRUSTED_PROXY_COUNT:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_COUNT)
 # For production, use a strong, randomly-generated secret loaded from an environment variable.
 # You can generate a good key using: python -c 'import secrets; print(secrets.token_hex())'
 app.secret_key = os.environ.get("SECRET_KEY", "a-default-fallback-key-for-development")
+# Reject oversized upload requests before they are read. Werkzeug already spools
+# uploaded files to temporary files on disk instead of keeping them in memory.
+app.config["MAX_CONTENT_LENGTH"] = int(os.environ.get("MAX_UPLOAD_MB", "100")) * 1024 * 1024
+
+# Keep compiled templates on disk so freshly started workers don't recompile them.
+# Unless an app-owned JINJA_CACHE_DIR is given, Jinja uses its own per-user 0700
+# temp directory and checks its owner, so other local users can't plant bytecode.
+# Template auto-reload already follows debug mode, so it is off under Gunicorn.
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(os.environ.get("JINJA_CACHE_DIR"))
 
 cloudinary.config(
     cloud_name = os.environ.get("CLOUDINARY_CLOUD_NAME"),
@@ -26,8 +53,50 @@ cloudinary.config(
     api_secret = os.environ.get("CLOUDINARY_API_SECRET"),
     secure=True
 )
+# The SDK parses Admin API responses (e.g. 500-item resource listings) with the
+# stdlib json module; orjson decodes the same JSON several times faster.
+cloudinary.api_client.execute_request.json = SimpleNamespace(
+    loads=orjson.loads, dumps=json.dumps
+)
+
+# Limits login attempts per client IP so password guessing can't tie up workers
+# with slow password hash checks.
+limiter = Limiter(get_remote_address, app=app, storage_uri="memory://")
+
 PASSWORD_HASH = os.environ.get("DOCTOR_PASSWORD_HASH")
-ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg', 'gif', 'mp4', 'mov', 'webm'}
+if not PASSWORD_HASH:
+    app.logger.warning("DOCTOR_PASSWORD_HASH is not set; all logins will be rejected.")
+# Hash of a random password, checked instead when PASSWORD_HASH is not set
+_DUMMY_PASSWORD_HASH = generate_password_hash(secrets.token_hex())
+# Recently rejected (ip, password digest) pairs; repeating one skips the hash check
+_failed_logins = TTLCache(maxsize=1024, ttl=60)
+_failed_logins_lock = threading.Lock()
+ALLOWED_EXTENSIONS = frozenset({'pdf', 'png', 'jpg', 'jpeg', 'gif', 'mp4', 'mov', 'webm'})
+_CLEAN_NAME_RE = re.compile(r'[^a-zA-Z0-9_.-]')
+# Public ids of uploaded reports: '<patient folder>/<file name>', both from clean_name()
+_PATIENT_FILE_ID_RE = re.compile(r'[a-zA-Z0-9_.-]+/[a-zA-Z0-9_.-]+')
+MONTH_NAMES = ('', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+               'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+DELETE_BATCH_SIZE = 100  # Most public_ids Cloudinary accepts per delete_resources call
+ZIP_DOWNLOAD_WORKERS = 8  # Files downloaded at once while building a patient ZIP
+
+# Cloudinary URL options for the thumbnails shown on the reports page
+PDF_THUMBNAIL_OPTIONS = {
+    "resource_type": "image",  # PDFs are treated as images for transformations
+    "format": "jpg",           # Convert to JPG for the thumbnail
+    "page": 1,                 # Get the first page
+    "secure": True,
+}
+VIDEO_THUMBNAIL_OPTIONS = {
+    "resource_type": "video",
+    "transformation": [{'width': 400, 'crop': 'limit'}],
+    "format": "jpg",
+    "secure": True,
+}
+
+# Reports page data for all patients plus its search index, cleared on upload and delete.
+_reports_cache = TTLCache(maxsize=1, ttl=15)
+_reports_cache_lock = threading.Lock()
 
 def login_required(f):
     """
@@ -51,23 +120,102 @@ def clean_name(name):
     Sanitizes a string to be used as a patient name or filename.
     Replaces any character that is not a letter, number, or underscore with an underscore.
     """
-    return re.sub(r'[^a-zA-Z0-9_.-]', '_', name)
+    return _CLEAN_NAME_RE.sub('_', name)
 
 def allowed_file(filename):
     """Checks if a file's extension is in the ALLOWED_EXTENSIONS set."""
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    _, dot, extension = filename.rpartition('.')
+    return bool(dot) and extension.lower() in ALLOWED_EXTENSIONS
+
+def new_public_id(patient_folder):
+    """
+    Creates a unique public_id like 'PATIENT_1718000000000_a1b2c3' for a new upload.
+    The upload time in milliseconds keeps names in upload order, and the random
+    suffix keeps files uploaded in the same millisecond apart, so no counter
+    (and no folder listing) is needed.
+    """
+    return f"{patient_folder}_{time.time_ns() // 1_000_000}_{secrets.token_hex(3)}"
+
+def fetch_resources(**params):
+    """
+    Lists image/PDF and video resources from Cloudinary and returns them merged.
+    The two queries are independent, so they are sent in parallel.
+    """
+    def fetch(resource_type):
+        result = cloudinary.api.resources(
+            type="upload",
+            resource_type=resource_type,
+            max_results=500,
+            **params
+        )
+        return result.get("resources", [])
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        resources_img, resources_vid = executor.map(fetch, ("image", "video"))
+    return resources_img + resources_vid
 
-def get_next_index(patient_folder):
+def clear_reports_cache():
+    """Drops cached reports page data after files are uploaded or deleted."""
+    with _reports_cache_lock:
+        _reports_cache.clear()
+
+class ZipStream(io.RawIOBase):
     """
-    Counts existing files in a Cloudinary folder to determine the next file index.
+    Write-only, unseekable file object for zipfile.ZipFile.
+    Collects the bytes written so far so they can be streamed to the client.
     """
-    result = cloudinary.api.resources(
-        type="upload",
-        prefix=f"{patient_folder}/",
-        max_results=500  # Adjust if a patient might have more files
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        # zipfile may pass a reused buffer, so keep a copy unless it's immutable bytes
+        self._chunks.append(data if isinstance(data, bytes) else bytes(data))
+        return len(data)
+
+    def pop(self):
+        """Returns everything written since the last call and clears the buffer."""
+        data = self._chunks[0] if len(self._chunks) == 1 else b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+# Thumbnail URLs only depend on the public_id, so build each one once and reuse it
+@lru_cache(maxsize=4096)
+def pdf_thumbnail_url(public_id):
+    """Returns the URL of a JPG thumbnail of a PDF's first page."""
+    return cloudinary.utils.cloudinary_url(public_id, **PDF_THUMBNAIL_OPTIONS)[0]
+
+@lru_cache(maxsize=4096)
+def video_thumbnail_url(public_id):
+    """Returns the URL of a JPG thumbnail of a video."""
+    return cloudinary.utils.cloudinary_url(public_id, **VIDEO_THUMBNAIL_OPTIONS)[0]
+
+def upload_report(file, patient_folder, public_id):
+    """Uploads a single report file into the patient's Cloudinary folder."""
+    result = cloudinary.uploader.upload(
+        file,
+        folder=patient_folder,
+        public_id=public_id,
+        resource_type="auto",
+        access_mode="public"   # Ensure PDFs are publicly accessible
     )
-    return len(result.get("resources", [])) + 1
+    post_upload_hook(patient_folder, result)
+    return result
+
+def post_upload_hook(patient_folder, result):
+    """
+    Runs after each report is uploaded, with Cloudinary's upload result.
+    Does nothing for now. Follow-up processing (thumbnails, OCR, scans) goes
+    here, and anything slow should be queued rather than run in the request.
+    """
+
+def fetch_file(http, url):
+    """Downloads a file over the given requests session and returns its bytes."""
+    response = http.get(url, timeout=20)
+    response.raise_for_status()
+    return response.content
 
 @app.route("/", methods=["GET", "POST"])
 def index():
@@ -82,7 +230,7 @@ def index():
             return jsonify({"error": "Patient name is required."}), 400
 
         files = request.files.getlist("report")
-        if not files or all(f.filename == '' for f in files):
+        if not any(f.filename for f in files):
              return jsonify({"error": "No files selected."}), 400
         
         patient_folder = clean_name(patient)
@@ -90,35 +238,40 @@ def index():
             # This case handles if the name consists only of invalid characters
             return jsonify({"error": "Invalid patient name provided."}), 400
 
-        current_index = get_next_index(patient_folder)
-        uploaded_count = 0
+        uploads = []
         errors = []
 
         for f in files:
-            if f and f.filename and allowed_file(f.filename):
-                # Create a sequential public_id like 'patient-name_1', 'patient-name_2'
-                public_id = f"{patient_folder}_{current_index}"
-                
-                cloudinary.uploader.upload(
-                    f,
-                    folder=patient_folder,
-                    public_id=public_id,
-                    resource_type="auto",
-                    access_mode="public"   # Ensure PDFs are publicly accessible
-                )
-                current_index += 1
-                uploaded_count += 1
-            elif f and f.filename:
+            if not f.filename:
+                continue
+            if allowed_file(f.filename):
+                uploads.append((f, new_public_id(patient_folder)))
+            else:
                 # Collect errors for files that are not allowed
                 errors.append(f"File '{secure_filename(f.filename)}' has an unsupported type.")
 
+        # Each upload is a separate round-trip to Cloudinary, so send them in parallel
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [
+                executor.submit(upload_report, f, patient_folder, public_id)
+                for f, public_id in uploads
+            ]
+        for future in futures:
+            future.result()  # Re-raise any upload error
+        uploaded_count = len(uploads)
+
         if uploaded_count > 0:
+            clear_reports_cache()
             success_message = f"{uploaded_count} file(s) uploaded for {patient}."
             return jsonify({"success": success_message})
 
+        # Every selected file had an unsupported type
+        return jsonify({"error": " ".join(errors)}), 400
+
     return render_template("index.html")
 
 @app.route("/login", methods=["GET", "POST"])
+@limiter.limit("5/minute", methods=["POST"])
 def login():
     """
     Handles the doctor's login. On successful login, the user is added
@@ -126,18 +279,41 @@ def login():
     """
     error = None
     if request.method == "POST":
-        # Ensure the hash is set in the environment
-        if not PASSWORD_HASH:
-            error = "Application is not configured for login."
-        # Check the submitted password against the stored hash
-        elif check_password_hash(PASSWORD_HASH, request.form.get("password", "")):
+        password = request.form.get("password", "")
+        guess = (request.remote_addr, hashlib.sha256(password.encode()).hexdigest())
+        with _failed_logins_lock:
+            already_rejected = guess in _failed_logins
+
+        # Check the submitted password against the stored hash, skipping the
+        # slow check for a guess that was just rejected. If no hash is set in
+        # the environment, check against a dummy hash so the response takes
+        # as long and reads the same as a wrong password.
+        password_matches = not already_rejected and check_password_hash(
+            PASSWORD_HASH or _DUMMY_PASSWORD_HASH, password
+        )
+        if PASSWORD_HASH and password_matches:
             session["doctor"] = True
             return redirect(url_for('reports'))
         else:
+            with _failed_logins_lock:
+                _failed_logins[guess] = True
             error = "Invalid password."
     
     return render_template("login.html", error=error)
 
+@app.errorhandler(413)
+def request_too_large(e):
+    """Returns a JSON error the upload form can show when an upload is too large."""
+    limit_mb = app.config["MAX_CONTENT_LENGTH"] // (1024 * 1024)
+    return jsonify({"error": f"Upload is too large. The limit is {limit_mb} MB per upload."}), 413
+
+@app.errorhandler(429)
+def too_many_requests(e):
+    """Shows the login page with an error when the login rate limit is hit."""
+    return render_template(
+        "login.html", error="Too many login attempts. Please wait a minute."
+    ), 429
+
 @app.route("/logout")
 def logout():
     """Clears the session to log the user out."""
@@ -146,54 +322,32 @@ def logout():
     return redirect(url_for('index'))
 
 
-@app.route("/reports")
-@login_required
-def reports():
+def build_reports_data():
     """
-    Displays a list of all patients and their reports.
-    Includes a search functionality to filter patients by name.
-    This route requires the user to be logged in.
+    Groups all Cloudinary resources by patient for the reports page.
     """
-    search = request.args.get("search", "").lower()
     data = {}
 
-    # More efficient: Search directly and group results in Python.
-    # This allows searching by patient name (folder) or filename.
-    expression = None
-    if search:
-        # Search in folder (patient name) OR filename
-        expression = f"folder:*{search}* OR filename:*{search}*"
-
-    # Fetch images and PDFs (resource_type="image")
-    resources_img = cloudinary.api.resources(
-        type="upload",
-        resource_type="image",
-        max_results=500,
-        expression=expression
-    )
-
-    # Fetch videos (resource_type="video")
-    resources_vid = cloudinary.api.resources(
-        type="upload",
-        resource_type="video",
-        max_results=500,
-        expression=expression
-    )
+    # cloudinary.api.resources() can't filter by search term, so fetch
+    # everything once and let the search filter it in Python.
+    all_resources = fetch_resources()
 
-    # Merge the results from both queries
-    all_resources = (
-        resources_img.get("resources", []) + resources_vid.get("resources", [])
-    )
+    # Show each patient's newest files first, as Cloudinary's listing does
+    # by default. created_at is ISO-8601, so comparing the strings compares
+    # the dates.
+    all_resources.sort(key=lambda res: res["created_at"], reverse=True)
 
     for res in all_resources:
         public_id = res["public_id"]
+        folder, separator, basename = public_id.rpartition("/")
 
         # Skip root-level files by checking for a separator in the public_id
-        if "/" not in public_id:
+        if not separator:
             continue  
 
-        # The folder is the first part of the public_id
-        patient_name = public_id.split("/")[0]
+        # The folder is the patient name. Use the one Cloudinary returns and
+        # only fall back to the first part of the public_id when it's missing.
+        patient_name = res.get("folder") or folder.partition("/")[0]
 
         # Initialize patient entry if not exists
         if patient_name not in data:
@@ -204,12 +358,12 @@ def reports():
         "video_count": 0,
     }
 
-        upload_date = datetime.strptime(
-            res["created_at"], "%Y-%m-%dT%H:%M:%SZ"
-        ).strftime('%b %d, %Y')
+        # created_at is always 'YYYY-MM-DDTHH:MM:SSZ'; format it as 'Mon DD, YYYY'
+        created_at = res["created_at"]
+        upload_date = f"{MONTH_NAMES[int(created_at[5:7])]} {created_at[8:10]}, {created_at[:4]}"
 
         file_obj = {
-            "name": f"{public_id.split('/')[-1]}.{res['format']}",
+            "name": f"{basename}.{res['format']}",
             "date": upload_date,
             "url": res["secure_url"],
             "public_id": public_id,
@@ -227,46 +381,123 @@ def reports():
 
         # If it's a PDF, generate a thumbnail URL for the first page
         if file_obj.get("is_pdf"):
-            file_obj["thumbnail_url"] = cloudinary.utils.cloudinary_url(
-                public_id,
-                resource_type="image", # PDFs are treated as images for transformations
-                format="jpg",          # Convert to JPG for the thumbnail
-                page=1,                # Get the first page
-                secure=True
-            )[0]
+            file_obj["thumbnail_url"] = pdf_thumbnail_url(public_id)
         # If it's a video, generate a thumbnail image
         elif file_obj.get("is_video"):
-            file_obj["thumbnail_url"] = cloudinary.utils.cloudinary_url(
-                public_id,
-                resource_type="video",
-                transformation=[{'width': 400, 'crop': 'limit'}],
-                format="jpg",
-                secure=True
-            )[0]
+            file_obj["thumbnail_url"] = video_thumbnail_url(public_id)
 
         # Use setdefault for cleaner grouping
         data[patient_name]["files"].append(file_obj)
 
+    return data
+
+def build_search_index(data):
+    """
+    Lowercases every patient and file name once, so searches are plain
+    substring checks: {patient: (patient_lower, [file_name_lower, ...])}.
+    """
+    return {
+        patient: (patient.lower(), [f["name"].lower() for f in patient_data["files"]])
+        for patient, patient_data in data.items()
+    }
+
+def filter_reports_data(data, search_index, search):
+    """
+    Keeps patients whose name contains the (lowercase) search term with all
+    their files, and for other patients only the files whose name contains it.
+    """
+    results = {}
+    for patient, (patient_lower, names_lower) in search_index.items():
+        patient_data = data[patient]
+        if search in patient_lower:
+            results[patient] = patient_data
+            continue
+
+        files = [
+            f for f, name_lower in zip(patient_data["files"], names_lower)
+            if search in name_lower
+        ]
+        if files:
+            pdf_count = sum(f["is_pdf"] for f in files)
+            video_count = sum(f["is_video"] for f in files)
+            results[patient] = {
+                "files": files,
+                "pdf_count": pdf_count,
+                "image_count": len(files) - pdf_count - video_count,
+                "video_count": video_count,
+            }
+    return results
+
+@app.route("/reports")
+@login_required
+def reports():
+    """
+    Displays a list of all patients and their reports.
+    Includes a search functionality to filter patients by name.
+    This route requires the user to be logged in.
+    """
+    search = request.args.get("search", "").lower()
+
+    # Reuse recently built data so back-to-back page loads and searches don't
+    # each query Cloudinary and rebuild every file entry again
+    with _reports_cache_lock:
+        cached = _reports_cache.get("all")
+    if cached is None:
+        data = build_reports_data()
+        cached = (data, build_search_index(data))
+        with _reports_cache_lock:
+            _reports_cache["all"] = cached
+
+    data, search_index = cached
+    if search:
+        data = filter_reports_data(data, search_index, search)
+
     return render_template("reports.html", data=data, search=search)
 
 @app.route("/delete", methods=["POST"])
 @login_required
 def delete_file():
     """
-    Deletes a specific report file from Cloudinary.
+    Deletes one or more report files from Cloudinary.
+    Each `public_id` field may be paired with a `resource_type` field.
     Requires the user to be logged in.
     """
-    public_id = request.form.get("public_id")
-    if public_id:
-        # Deleting requires the public_id
-        # We must also specify the resource_type for videos
-        resource_type = request.form.get("resource_type", "image")
-        cloudinary.uploader.destroy(
-            public_id, resource_type=resource_type
-        )
-        flash(f"Report was deleted successfully.", "success")
-    else:
+    # Deleting requires the public_id
+    # We must also specify the resource_type for videos
+    public_ids = request.form.getlist("public_id")
+    resource_types = request.form.getlist("resource_type")
+    resource_types += ["image"] * (len(public_ids) - len(resource_types))
+
+    # Only delete files inside a patient folder, as index() uploads them,
+    # so a crafted form can't reach other assets in the Cloudinary account
+    to_delete = [
+        (public_id, resource_type)
+        for public_id, resource_type in zip(public_ids, resource_types)
+        if _PATIENT_FILE_ID_RE.fullmatch(public_id)
+    ]
+
+    if not public_ids:
         flash("Could not delete report: missing ID.", "error")
+    elif len(to_delete) != len(public_ids):
+        flash("Could not delete report: invalid ID.", "error")
+    else:
+        by_type = {}
+        for public_id, resource_type in to_delete:
+            by_type.setdefault(resource_type, []).append(public_id)
+
+        # Delete in batches instead of one request per file
+        for resource_type, ids in by_type.items():
+            for start in range(0, len(ids), DELETE_BATCH_SIZE):
+                cloudinary.api.delete_resources(
+                    ids[start:start + DELETE_BATCH_SIZE], resource_type=resource_type
+                )
+
+        clear_reports_cache()
+
+        if len(public_ids) == 1:
+            flash("Report was deleted successfully.", "success")
+        else:
+            flash(f"{len(public_ids)} reports were deleted successfully.", "success")
         
     return redirect(url_for('reports'))
 
@@ -285,47 +516,60 @@ def download_patient_zip(patient):
     patient = clean_name(patient)
 
     # Get all files for this patient from Cloudinary
-    result_img = cloudinary.api.resources(
-        type="upload",
-        resource_type="image",
-        prefix=f"{patient}/",
-        max_results=500
-    )
-
-    result_vid = cloudinary.api.resources(
-        type="upload",
-        resource_type="video",
-        prefix=f"{patient}/",
-        max_results=500
-    )
-
-    all_files = result_img.get("resources", []) + result_vid.get("resources", [])
+    all_files = fetch_resources(prefix=f"{patient}/")
 
     if not all_files:
         flash("No files found for this patient.", "error")
         return redirect(url_for("reports"))
 
-    zip_buffer = io.BytesIO()
-
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-        for file in all_files:
-            file_url = file["secure_url"]
-            filename = f"{file['public_id'].split('/')[-1]}.{file['format']}"
+    def generate():
+        # Download a fixed window of files in parallel over one pooled session,
+        # but write them into the archive from this thread only (ZipFile is not
+        # thread-safe). Each file's compressed bytes are sent as soon as they
+        # are written, and its downloaded bytes are dropped right after, so
+        # memory stays bounded by the window rather than the whole patient.
+        zip_stream = ZipStream()
+        pending = iter(all_files)
+        futures = {}
+
+        with requests.Session() as http:
+            executor = ThreadPoolExecutor(max_workers=ZIP_DOWNLOAD_WORKERS)
+
+            def submit_next():
+                file = next(pending, None)
+                if file is not None:
+                    name = f"{file['public_id'].split('/')[-1]}.{file['format']}"
+                    futures[executor.submit(fetch_file, http, file["secure_url"])] = name
 
             try:
-                response = requests.get(file_url, timeout=20)
-                response.raise_for_status()
-                zipf.writestr(filename, response.content)
-            except Exception:
-                continue
-
-    zip_buffer.seek(0)
-
-    return send_file(
-        zip_buffer,
+                with zipfile.ZipFile(zip_stream, "w", zipfile.ZIP_DEFLATED) as zipf:
+                    for _ in range(ZIP_DOWNLOAD_WORKERS):
+                        submit_next()
+
+                    while futures:
+                        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            name = futures.pop(future)
+                            submit_next()
+                            try:
+                                content = future.result()
+                            except Exception:
+                                continue
+                            zipf.writestr(name, content)
+                            del content
+                            yield zip_stream.pop()
+                        del done
+
+                # Closing the archive writes the central directory
+                yield zip_stream.pop()
+            finally:
+                # If the client disconnected, don't keep downloading files for it
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    return Response(
+        generate(),
         mimetype="application/zip",
-        as_attachment=True,
-        download_name=f"{patient}_reports.zip"
+        headers={"Content-Disposition": f"attachment; filename={patient}_reports.zip"}
     )
 
 
@@ -337,4 +581,6 @@ def download_patient_zip(patient):
 
 if __name__ == "__main__":
     # The development server is not for production. A WSGI server like Gunicorn will run the app.
-    app.run(debug=True, host='0.0.0.0')
+    # Set FLASK_DEBUG=1 to enable the debugger and auto-reload while developing;
+    # app.run() reads it itself, so "0" or "false" keep the debugger off.
+    app.run(host='0.0.0.0')
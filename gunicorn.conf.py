@@ -0,0 +1,18 @@
+# Gunicorn settings, picked up automatically by `gunicorn app:app` (see Procfile).
+import os
+
+# One worker process on purpose: the login rate limit (Flask-Limiter's memory://
+# store), the rejected-guess cache and the reports cache all live in process
+# memory. Extra processes would each get their own copy, multiplying the login
+# limit and letting /reports show files that another process just deleted.
+# This also overrides WEB_CONCURRENCY, which some hosts set from their CPU count.
+workers = 1
+
+# The app mostly waits on Cloudinary, so threads are enough to keep slow uploads
+# and ZIP downloads from holding up other requests. 8 suits a small instance.
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+
+# Keep worker heartbeat files in memory instead of on a possibly slow disk
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"